@@ -233,6 +233,8 @@ async function generateReport() {
 
     try {
         const response = await fetch(`${API_BASE_URL}/report/generate`, { method: 'POST', body: formData });
+        if (!response.ok) throw new Error('Report generation failed');
+
         const data = await response.json();
         currentReportData = data;
 
@@ -273,15 +275,38 @@ function populateReport(data) {
     });
 }
 
-function downloadPDF() {
-    const element = elements.reportContent;
-    html2pdf().set({
-        margin: 0.5,
-        filename: `MedicalReport_${currentReportData ? currentReportData.patient_id : 'Scan'}.pdf`,
-        image: { type: 'jpeg', quality: 0.98 },
-        html2canvas: { scale: 2 },
-        jsPDF: { unit: 'in', format: 'letter', orientation: 'portrait' }
-    }).from(element).save();
+async function downloadPDF() {
+    if (!currentReportData || !currentReportData.pdf_url) {
+        alert('PDF Error: No report available. Please generate the report again.');
+        return;
+    }
+
+    // The PDF's built-in fonts only cover Latin text; offer the exact HTML report instead
+    let url = currentReportData.pdf_url;
+    let extension = 'pdf';
+    if (currentReportData.pdf_complete === false && confirm(
+        'Some text in this report (e.g. a non-Latin patient name) cannot be shown in the PDF and will appear as "?".\n\n' +
+        'Download the HTML report instead?'
+    )) {
+        url = currentReportData.html_url;
+        extension = 'html';
+    }
+
+    // The report is rendered (and cached) server-side from the generated report data.
+    try {
+        const response = await fetch(`${API_BASE_URL}${url}`);
+        if (!response.ok) throw new Error('PDF download failed');
+
+        const blob = await response.blob();
+        const link = document.createElement('a');
+        link.href = URL.createObjectURL(blob);
+        link.download = `MedicalReport_${currentReportData.patient_id}.${extension}`;
+        link.click();
+        // Revoking immediately can cancel the download in some browsers
+        setTimeout(() => URL.revokeObjectURL(link.href), 10000);
+    } catch (error) {
+        alert(`PDF Error: ${error.message}`);
+    }
 }
 
 function showLoading(show, text = "Processing...") {
@@ -12,27 +12,51 @@ This API accepts medical scan images and returns:
 import os
 import base64
 import json
+import math
+import time
+import uuid
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 from io import BytesIO
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from pydantic import BaseModel
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI
 from PIL import Image
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
+from report_renderer import (
+    render_report_pdf,
+    render_report_html,
+    build_report_archive,
+    unsupported_pdf_characters,
+)
+
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the shared async OpenAI client's connection pool on shutdown."""
+    yield
+    global async_openai_client
+    if async_openai_client is not None:
+        await async_openai_client.close()
+        async_openai_client = None
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Smart Medical Card - Scan Analysis API",
     description="AI-powered medical scan analysis using GPT-4o Vision",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -62,8 +86,48 @@ def get_openai_client():
         http_client=http_client
     )
 
+
+async_openai_client: Optional[AsyncAzureOpenAI] = None
+
+
+def get_async_openai_client() -> AsyncAzureOpenAI:
+    """Shared async Azure OpenAI client, created on first use by hedged requests."""
+    global async_openai_client
+    if async_openai_client is None:
+        verify_ssl = os.getenv("VERIFY_SSL", "True").lower() == "true"
+        http_client = httpx.AsyncClient(verify=verify_ssl)
+
+        # One connection pool for every hedged call; cancelled losers release their connection back to it
+        async_openai_client = AsyncAzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_KEY"),
+            api_version="2024-02-15-preview",
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            max_retries=3,
+            timeout=30.0,
+            http_client=http_client
+        )
+    return async_openai_client
+
 DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-vision")
 
+# Hedged requests: if the vision call is slower than the learned latency percentile,
+# fire a second identical request and keep whichever finishes first.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "False").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", "0.1"))  # Max fraction of requests that may hedge
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+
+# Generated reports kept in memory so PDF/HTML renders can be served and re-served by ID.
+# The cache is per process: run a single worker, or report URLs may 404 on another worker.
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+report_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+REPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "html": "text/html",
+}
+
 
 # =============================================================================
 # Response Models
@@ -87,6 +151,27 @@ class HealthCheckResponse(BaseModel):
     timestamp: str
 
 
+class ReportArchiveRequest(BaseModel):
+    report_ids: list[str]
+    format: str = "pdf"
+
+
+class HedgingMetricsResponse(BaseModel):
+    enabled: bool
+    requests: int
+    hedges_fired: int
+    hedge_wins: int
+    budget_exhausted: int
+    hedge_rate: float
+    recent_hedge_rate: float
+    hedge_win_rate: float
+    hedge_delay_seconds: Optional[float]
+    latency_samples: int
+    latency_p50_seconds: Optional[float]
+    latency_p99_seconds: Optional[float]
+    timestamp: str
+
+
 # =============================================================================
 # Medical Analysis Prompts
 # =============================================================================
@@ -254,6 +339,167 @@ def parse_gpt_response(response_text: str) -> dict:
     }
 
 
+def cache_report(report: dict) -> None:
+    """Store a generated report, evicting the least recently used entry when full."""
+    report_cache[report["report_id"]] = {"report": report, "rendered": {}}
+    report_cache.move_to_end(report["report_id"])
+    while len(report_cache) > REPORT_CACHE_SIZE:
+        report_cache.popitem(last=False)
+
+
+def get_rendered_report(report_id: str, report_format: str) -> bytes:
+    """Return a cached report rendered as PDF or HTML, rendering it on first use."""
+    if report_format not in REPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format must be 'pdf' or 'html'")
+
+    entry = report_cache.get(report_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Report not found: {report_id}")
+    report_cache.move_to_end(report_id)
+
+    rendered = entry["rendered"]
+    if report_format not in rendered:
+        report = entry["report"]
+        if report_format == "pdf":
+            rendered["pdf"] = render_report_pdf(
+                report["report_text"],
+                title=f"Medical Imaging Report - {report['patient_id']}"
+            )
+        else:
+            rendered["html"] = render_report_html(report).encode("utf-8")
+    return rendered[report_format]
+
+
+def report_filename(report_id: str, report_format: str) -> str:
+    """Download filename for a rendered report."""
+    patient_id = report_cache[report_id]["report"]["patient_id"]
+    safe_patient_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in patient_id)
+    return f"MedicalReport_{safe_patient_id}_{report_id[:8]}.{report_format}"
+
+
+# =============================================================================
+# Hedged Vision Requests
+# =============================================================================
+
+class LatencyTracker:
+    """Sliding window of recent vision call latencies (seconds)."""
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None if no samples have been recorded."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+
+latency_tracker = LatencyTracker(HEDGE_WINDOW)
+hedge_stats = {
+    "requests": 0,
+    "hedges_fired": 0,
+    "hedge_wins": 0,
+    "budget_exhausted": 0,
+}
+# Whether each of the last HEDGE_WINDOW requests hedged; the budget is enforced over this window
+hedge_window = deque(maxlen=HEDGE_WINDOW)
+
+
+def get_hedge_delay() -> Optional[float]:
+    """Delay before hedging, learned from recent latencies. None until enough samples."""
+    if len(latency_tracker.samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return latency_tracker.percentile(HEDGE_PERCENTILE)
+
+
+def hedge_budget_available() -> bool:
+    """
+    Whether firing one more hedge keeps the recent hedge rate within HEDGE_BUDGET.
+
+    Counted over the last HEDGE_WINDOW requests, so a long quiet period does not
+    bank credit that an upstream slowdown could then spend all at once.
+    """
+    recent_hedges = sum(hedge_window) + 1
+    return recent_hedges <= HEDGE_BUDGET * (len(hedge_window) + 1)
+
+
+async def hedged_chat_completion(request: dict):
+    """
+    Run a chat completion with an optional hedge request.
+
+    The primary request is sent immediately. If it has not finished by the learned
+    hedge delay and the budget allows, an identical request is sent. The first
+    successful response wins and the other request is cancelled.
+    """
+    client = get_async_openai_client()
+    hedge_stats["requests"] += 1
+    start = time.monotonic()
+
+    primary = asyncio.create_task(client.chat.completions.create(**request))
+    hedge = None
+    pending = {primary}
+    hedged = False
+
+    try:
+        hedge_delay = get_hedge_delay()
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if not done:
+                if hedge_budget_available():
+                    hedged = True
+                    hedge_stats["hedges_fired"] += 1
+                    hedge = asyncio.create_task(client.chat.completions.create(**request))
+                    pending.add(hedge)
+                else:
+                    hedge_stats["budget_exhausted"] += 1
+
+        # First successful response wins; only fail once every request has failed
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Retrieve every exception before returning, or asyncio logs it as never retrieved
+            winners = []
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                else:
+                    winners.append(task)
+            if winners:
+                winner = primary if primary in winners else winners[0]
+                if winner is hedge:
+                    hedge_stats["hedge_wins"] += 1
+                latency_tracker.record(time.monotonic() - start)
+                return winner.result()
+        raise error
+    finally:
+        hedge_window.append(hedged)
+        for task in pending:
+            task.cancel()
+
+
+def get_hedging_metrics() -> dict:
+    """Snapshot of hedging counters and learned latency distribution."""
+    requests = hedge_stats["requests"]
+    fired = hedge_stats["hedges_fired"]
+    return {
+        "enabled": HEDGE_ENABLED,
+        **hedge_stats,
+        "hedge_rate": fired / requests if requests else 0.0,
+        "recent_hedge_rate": sum(hedge_window) / len(hedge_window) if hedge_window else 0.0,
+        "hedge_win_rate": hedge_stats["hedge_wins"] / fired if fired else 0.0,
+        "hedge_delay_seconds": get_hedge_delay(),
+        "latency_samples": len(latency_tracker.samples),
+        "latency_p50_seconds": latency_tracker.percentile(50),
+        "latency_p99_seconds": latency_tracker.percentile(99),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 # =============================================================================
 # API Endpoints
 # =============================================================================
@@ -278,6 +524,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics/hedging", response_model=HedgingMetricsResponse)
+async def hedging_metrics():
+    """Vision call latency and hedged request statistics."""
+    return get_hedging_metrics()
+
+
 @app.post("/analyze", response_model=ScanAnalysisResponse)
 async def analyze_scan(
     file: UploadFile = File(..., description="Medical scan image (JPEG, PNG)"),
@@ -311,8 +563,7 @@ async def analyze_scan(
         prompt = select_prompt(scan_type)
         
         # Call GPT-4o Vision
-        client = get_openai_client()
-        response = client.chat.completions.create(
+        request = dict(
             model=DEPLOYMENT_NAME,
             messages=[
                 {
@@ -339,6 +590,13 @@ async def analyze_scan(
             max_tokens=2000,
             temperature=0.3  # Lower temperature for more consistent medical analysis
         )
+        if HEDGE_ENABLED:
+            response = await hedged_chat_completion(request)
+        else:
+            client = get_openai_client()
+            start = time.monotonic()
+            response = client.chat.completions.create(**request)
+            latency_tracker.record(time.monotonic() - start)
         
         # Parse response
         result_text = response.choices[0].message.content
@@ -395,11 +653,21 @@ async def generate_full_report(
     file: UploadFile = File(...),
     patient_id: str = Form(..., description="Patient ID for the report"),
     patient_name: str = Form(default="[REDACTED]", description="Patient name"),
-    scan_type: Optional[str] = Form(None)
+    scan_type: Optional[str] = Form(None),
+    report_format: str = Form(default="json", alias="format", description="Response format: json, pdf, or html")
 ):
     """
     Generate a full radiologist-style report for medical records.
+
+    - **format**: `json` (default) returns the report data plus `pdf_url` / `html_url`;
+      `pdf` or `html` returns the rendered document directly.
+
+    Rendered documents are cached per report and can be re-fetched from
+    `/report/{report_id}/pdf` or `/report/{report_id}/html`.
     """
+    if report_format not in ("json", *REPORT_MEDIA_TYPES):
+        raise HTTPException(status_code=400, detail="Format must be 'json', 'pdf' or 'html'")
+
     # First get the analysis
     analysis_response = await analyze_scan(file=file, scan_type=scan_type)
     
@@ -445,13 +713,62 @@ Report Generated By: Smart Medical Card AI System (Imagine Cup 2026)
 ================================================================================
 """
     
-    return {
+    report_id = uuid.uuid4().hex
+    result = {
         "success": True,
+        "report_id": report_id,
         "patient_id": patient_id,
+        "patient_name": patient_name,
         "report_text": report,
         "analysis": analysis_response.model_dump(),
-        "generated_at": datetime.utcnow().isoformat()
+        "generated_at": datetime.utcnow().isoformat(),
+        "pdf_url": f"/report/{report_id}/pdf",
+        "html_url": f"/report/{report_id}/html",
+        # False when the PDF's built-in fonts cannot show some text (e.g. a Devanagari name)
+        "pdf_complete": not unsupported_pdf_characters(report)
     }
+    cache_report(result)
+
+    if report_format != "json":
+        return await download_report(report_id, report_format)
+    return result
+
+
+@app.get("/report/{report_id}/{report_format}")
+async def download_report(report_id: str, report_format: str):
+    """
+    Download a previously generated report as a server-rendered PDF or HTML document.
+    """
+    content = get_rendered_report(report_id, report_format)
+    filename = report_filename(report_id, report_format)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if report_format == "pdf" and not report_cache[report_id]["report"]["pdf_complete"]:
+        headers["X-PDF-Complete"] = "false"
+    return Response(
+        content=content,
+        media_type=REPORT_MEDIA_TYPES[report_format],
+        headers=headers
+    )
+
+
+@app.post("/report/archive")
+async def download_report_archive(request: ReportArchiveRequest):
+    """
+    Download many previously generated reports as a single ZIP archive.
+    """
+    if not request.report_ids:
+        raise HTTPException(status_code=400, detail="report_ids must not be empty")
+
+    files = {}
+    # Duplicate IDs would produce duplicate ZIP entries; keep first-seen order
+    for report_id in dict.fromkeys(request.report_ids):
+        content = get_rendered_report(report_id, request.format)
+        files[report_filename(report_id, request.format)] = content
+    return Response(
+        content=build_report_archive(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="MedicalReports.zip"'}
+    )
 
 
 # =============================================================================
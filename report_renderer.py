@@ -0,0 +1,341 @@
+"""
+Server-side Report Rendering
+Smart Medical Card System - Imagine Cup 2026
+
+Renders the radiologist-style report produced by /report/generate as:
+- A vector PDF (standard Courier/Helvetica fonts, Flate-compressed text streams;
+  text outside their Latin character set is flagged in the PDF, see render_report_pdf)
+- A self-contained HTML document
+
+Pure Python (standard library only) so no native toolchain is required
+on the App Service image, and rendering takes milliseconds.
+"""
+
+import html
+import unicodedata
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Optional
+
+
+# =============================================================================
+# PDF Layout (US Letter, points)
+# =============================================================================
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 54
+FONT_SIZE = 9
+LINE_HEIGHT = 11.5
+# Courier glyphs are 0.6 em wide, so wrapping by character count is exact.
+CHARS_PER_LINE = int((PAGE_WIDTH - 2 * MARGIN) / (FONT_SIZE * 0.6))
+LINES_PER_PAGE = int((PAGE_HEIGHT - 2 * MARGIN - LINE_HEIGHT) / LINE_HEIGHT)
+
+# The standard PDF fonts only cover WinAnsi (cp1252). Clinical symbols outside it
+# are spelled out rather than dropped, so "≥12 follicles" never renders as "?12".
+PDF_TRANSLITERATIONS = {
+    "≥": ">=",
+    "≤": "<=",
+    "≠": "!=",
+    "≈": "~",
+    "→": "->",
+    "←": "<-",
+    "↑": "^",
+    "↓": "v",
+    "↔": "<->",
+    "⇒": "=>",
+    "−": "-",
+    "√": "sqrt",
+    "∞": "inf",
+    "✓": "v",
+    "✔": "v",
+    "✗": "x",
+    "✘": "x",
+    "μ": "\u00b5",
+    "α": "alpha",
+    "β": "beta",
+    "γ": "gamma",
+    "δ": "delta",
+    "Δ": "Delta",
+    "κ": "kappa",
+    "λ": "lambda",
+    "σ": "sigma",
+    "\u00a0": " ",
+}
+PDF_TRANSLITERATION_TABLE = str.maketrans(PDF_TRANSLITERATIONS)
+
+
+# =============================================================================
+# Helper Functions
+# =============================================================================
+
+def wrap_report_lines(report_text: str, width: int = CHARS_PER_LINE) -> list[str]:
+    """Hard-wrap report text to a fixed column width, preserving indentation."""
+    lines = []
+    for raw_line in report_text.strip("\n").splitlines():
+        line = raw_line.rstrip()
+        if len(line) <= width:
+            lines.append(line)
+            continue
+
+        # Cap the indent so every wrapped line has room for text
+        indent = " " * min(len(line) - len(line.lstrip()), width // 2)
+        current = ""
+        for word in line.split():
+            candidate = f"{current} {word}" if current else f"{indent}{word}"
+            if len(candidate) <= width:
+                current = candidate
+                continue
+            if current:
+                lines.append(current)
+            # Break words longer than a whole line
+            while len(indent) + len(word) > width:
+                lines.append(indent + word[:width - len(indent)])
+                word = word[width - len(indent):]
+            current = indent + word
+        if current:
+            lines.append(current)
+    return lines
+
+
+def encode_winansi_char(char: str) -> Optional[bytes]:
+    """Encode one (already transliterated) character as WinAnsi, or None if impossible."""
+    try:
+        return char.encode("cp1252")
+    except UnicodeEncodeError:
+        pass
+    # Accented letters outside cp1252 fall back to their base letter
+    base = unicodedata.normalize("NFKD", char)
+    base = "".join(c for c in base if not unicodedata.combining(c))
+    try:
+        return base.encode("cp1252") if base else None
+    except UnicodeEncodeError:
+        return None
+
+
+def to_winansi(text: str) -> bytes:
+    """
+    Encode text as WinAnsi (cp1252) for the standard PDF fonts.
+
+    Known clinical symbols are transliterated and accented characters are
+    decomposed to their base letter; anything still unencodable becomes "?"
+    (see unsupported_pdf_characters, which render_report_pdf uses to flag it).
+    """
+    encoded = bytearray()
+    for char in text.translate(PDF_TRANSLITERATION_TABLE):
+        encoded += encode_winansi_char(char) or b"?"
+    return bytes(encoded)
+
+
+def unsupported_pdf_characters(text: str) -> list[str]:
+    """Characters the built-in PDF fonts cannot show, in first-seen order."""
+    missing = {}
+    for char in text.translate(PDF_TRANSLITERATION_TABLE):
+        if char not in missing and encode_winansi_char(char) is None:
+            missing[char] = None
+    return list(missing)
+
+
+def build_unsupported_notice(missing: list[str]) -> str:
+    """Warning printed at the top of a PDF that could not show every character."""
+    codes = " ".join(f"U+{ord(char):04X}" for char in missing[:12])
+    if len(missing) > 12:
+        codes += " ..."
+    return (
+        "!! PDF CHARACTER NOTICE !!\n"
+        f"This PDF cannot display {len(missing)} distinct character(s) used in this report "
+        "(for example Devanagari or other non-Latin script, such as in the patient name). "
+        'They appear as "?" below. The HTML version of this report shows the exact text.\n'
+        f"Unsupported characters: {codes}\n"
+        "\n"
+    )
+
+
+def escape_pdf_text(text: str) -> bytes:
+    """Encode text for a PDF string literal (WinAnsi, escaped delimiters)."""
+    encoded = to_winansi(text)
+    return (
+        encoded.replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+    )
+
+
+def build_page_stream(lines: list[str], page_number: int, page_count: int, footer: str) -> bytes:
+    """Build the content stream for a single page of text."""
+    # The ' operator advances one line before drawing, so start a line above
+    top = PAGE_HEIGHT - MARGIN
+    parts = [
+        b"BT",
+        f"/F1 {FONT_SIZE} Tf {LINE_HEIGHT} TL {MARGIN} {top} Td".encode("ascii"),
+    ]
+    for line in lines:
+        parts.append(b"(" + escape_pdf_text(line) + b") '")
+    parts.append(b"ET")
+
+    footer_text = f"{footer}  |  Page {page_number} of {page_count}"
+    parts.extend([
+        b"BT",
+        f"/F2 7 Tf {MARGIN} {MARGIN / 2} Td".encode("ascii"),
+        b"(" + escape_pdf_text(footer_text) + b") Tj",
+        b"ET",
+    ])
+    return b"\n".join(parts)
+
+
+# =============================================================================
+# Renderers
+# =============================================================================
+
+def render_report_pdf(report_text: str, title: str = "Medical Imaging Report") -> bytes:
+    """
+    Render report text as a compact vector PDF.
+
+    Text is laid out in Courier so the fixed-width report formatting
+    (rules, bullets, numbered lists) is preserved exactly. The built-in fonts
+    only cover Latin text; if anything cannot be shown, a notice at the top of
+    the first page says so instead of silently printing "?".
+    """
+    missing = unsupported_pdf_characters(title + report_text)
+    if missing:
+        report_text = build_unsupported_notice(missing) + report_text.strip("\n")
+
+    # Transliterate before wrapping so multi-character substitutions stay in the column
+    lines = wrap_report_lines(report_text.translate(PDF_TRANSLITERATION_TABLE)) or [""]
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    # Object layout: 1 catalog, 2 pages, 3 info, 4-5 fonts, then (page, content) pairs
+    objects: list[bytes] = [b""] * (5 + 2 * len(pages))
+    page_refs = []
+    for index, page_lines in enumerate(pages):
+        page_id = 6 + 2 * index
+        content_id = page_id + 1
+        page_refs.append(f"{page_id} 0 R")
+
+        stream = zlib.compress(build_page_stream(page_lines, index + 1, len(pages), title))
+        objects[page_id - 1] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("ascii")
+        objects[content_id - 1] = (
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+            + stream
+            + b"\nendstream"
+        )
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(pages)} >>".encode("ascii")
+    objects[2] = (
+        b"<< /Title (" + escape_pdf_text(title) + b") "
+        b"/Producer (Smart Medical Card AI System) >>"
+    )
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>"
+    objects[4] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+
+    buffer = BytesIO()
+    buffer.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(buffer.tell())
+        buffer.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    xref_offset = buffer.tell()
+    buffer.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for offset in offsets:
+        buffer.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    buffer.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 3 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+    )
+    return buffer.getvalue()
+
+
+def render_report_html(report: dict) -> str:
+    """
+    Render a /report/generate payload as a standalone HTML document.
+
+    Expects the same shape returned by the endpoint: patient_id, patient_name,
+    generated_at and the ScanAnalysisResponse fields under "analysis".
+    """
+    analysis = report["analysis"]
+    esc = html.escape
+
+    findings = "\n".join(f"      <li>{esc(f)}</li>" for f in analysis.get("findings", []))
+    recommendations = "\n".join(f"      <li>{esc(r)}</li>" for r in analysis.get("recommendations", []))
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <title>Medical Imaging Report - {esc(report["patient_id"])}</title>
+  <style>
+    body {{ font-family: Inter, Helvetica, Arial, sans-serif; color: #1a2b48; max-width: 800px; margin: 2rem auto; line-height: 1.5; }}
+    header {{ border-bottom: 3px solid #c9a227; margin-bottom: 1.5rem; }}
+    h1 {{ margin: 0; font-size: 1.5rem; }}
+    h2 {{ font-size: 1rem; text-transform: uppercase; letter-spacing: 0.05em; border-bottom: 1px solid #dde3ec; }}
+    dl {{ display: grid; grid-template-columns: max-content 1fr; gap: 0.25rem 1rem; }}
+    dt {{ font-weight: 600; }}
+    .disclaimer {{ font-size: 0.8rem; color: #5a6b85; border-top: 1px solid #dde3ec; padding-top: 1rem; margin-top: 2rem; }}
+  </style>
+</head>
+<body>
+  <header>
+    <h1>Medical Imaging Report</h1>
+    <p>Smart Medical Card System</p>
+  </header>
+
+  <section>
+    <h2>Patient Information</h2>
+    <dl>
+      <dt>Patient ID</dt><dd>{esc(report["patient_id"])}</dd>
+      <dt>Patient Name</dt><dd>{esc(report.get("patient_name", ""))}</dd>
+      <dt>Report Date</dt><dd>{esc(report["generated_at"])}</dd>
+      <dt>Scan Type</dt><dd>{esc(analysis["scan_type"])}</dd>
+    </dl>
+  </section>
+
+  <section>
+    <h2>Findings</h2>
+    <ul>
+{findings}
+    </ul>
+  </section>
+
+  <section>
+    <h2>Impression</h2>
+    <dl>
+      <dt>Classification</dt><dd>{esc(analysis["classification"].upper())}</dd>
+      <dt>Confidence Level</dt><dd>{esc(analysis["confidence"])}</dd>
+    </dl>
+  </section>
+
+  <section>
+    <h2>Detailed Report</h2>
+    <p>{esc(analysis["report"])}</p>
+  </section>
+
+  <section>
+    <h2>Recommendations</h2>
+    <ol>
+{recommendations}
+    </ol>
+  </section>
+
+  <p class="disclaimer">
+    DISCLAIMER: {esc(analysis["disclaimer"])}<br>
+    AI Analysis Timestamp: {esc(analysis["timestamp"])}<br>
+    Report Generated By: Smart Medical Card AI System (Imagine Cup 2026)
+  </p>
+</body>
+</html>
+"""
+
+
+def build_report_archive(files: dict[str, bytes]) -> bytes:
+    """Bundle rendered reports into a single ZIP archive."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
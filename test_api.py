@@ -4,6 +4,8 @@ Run this after starting the server to verify everything works.
 """
 
 import os
+import io
+import zipfile
 import requests
 import base64
 from pathlib import Path
@@ -23,6 +25,21 @@ def test_health():
     return response.status_code == 200
 
 
+def test_hedging_metrics():
+    """Test hedged request metrics endpoint."""
+    print("\n🔍 Testing hedging metrics endpoint...")
+    response = requests.get(f"{API_URL}/metrics/hedging")
+    print(f"   Status: {response.status_code}")
+    if response.status_code != 200:
+        return False
+
+    metrics = response.json()
+    print(f"   Enabled: {metrics['enabled']}")
+    print(f"   Hedges fired/won: {metrics['hedges_fired']}/{metrics['hedge_wins']} of {metrics['requests']} requests")
+    print(f"   Latency p50/p99: {metrics['latency_p50_seconds']} / {metrics['latency_p99_seconds']}")
+    return 0.0 <= metrics["hedge_rate"] <= 1.0 and metrics["hedge_wins"] <= metrics["hedges_fired"]
+
+
 def test_analyze_with_sample():
     """Test analyze endpoint with a sample/test image."""
     print("\n🔍 Testing analyze endpoint...")
@@ -59,6 +76,59 @@ def test_analyze_with_sample():
     return response.status_code == 200
 
 
+def test_report_downloads():
+    """Test server-rendered PDF/HTML reports and the batch archive."""
+    print("\n🔍 Testing report rendering endpoints...")
+
+    # Unknown IDs should 404 without touching Azure
+    response = requests.get(f"{API_URL}/report/does-not-exist/pdf")
+    print(f"   Unknown report status: {response.status_code}")
+    if response.status_code != 404:
+        return False
+
+    test_image_bytes = base64.b64decode(
+        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+    )
+    files = {"file": ("test_image.png", test_image_bytes, "image/png")}
+    response = requests.post(
+        f"{API_URL}/report/generate",
+        files=files,
+        data={"patient_id": "PT-TEST", "format": "json"}
+    )
+    print(f"   Generate status: {response.status_code}")
+    if response.status_code != 200:
+        print(f"   Error: {response.text}")
+        return False
+
+    report = response.json()
+    pdf = requests.get(f"{API_URL}{report['pdf_url']}")
+    html = requests.get(f"{API_URL}{report['html_url']}")
+    print(f"   PDF: {pdf.status_code}, {len(pdf.content)} bytes")
+    print(f"   HTML: {html.status_code}, {len(html.content)} bytes")
+    if not pdf.content.startswith(b"%PDF") or "<!DOCTYPE html>" not in html.text:
+        return False
+
+    # Duplicate IDs collapse to one archive entry
+    archive = requests.post(
+        f"{API_URL}/report/archive",
+        json={"report_ids": [report["report_id"], report["report_id"]], "format": "pdf"}
+    )
+    names = zipfile.ZipFile(io.BytesIO(archive.content)).namelist()
+    print(f"   Archive entries: {names}")
+    if len(names) != 1:
+        return False
+
+    # format=pdf returns the document directly
+    files = {"file": ("test_image.png", test_image_bytes, "image/png")}
+    direct = requests.post(
+        f"{API_URL}/report/generate",
+        files=files,
+        data={"patient_id": "PT-TEST", "format": "pdf"}
+    )
+    print(f"   Direct PDF: {direct.status_code}, {direct.headers.get('content-type')}")
+    return direct.status_code == 200 and direct.content.startswith(b"%PDF")
+
+
 def test_with_real_image(image_path: str, scan_type: str = None):
     """Test with a real medical image."""
     print(f"\n🔍 Testing with real image: {image_path}")
@@ -108,14 +178,28 @@ def main():
         print("   Run: python main.py")
         return
     
-    # Test 2: Basic analyze (with dummy image)
+    # Test 2: Hedging metrics
+    print("\n" + "-" * 60)
+    if test_hedging_metrics():
+        print("   ✅ Hedging metrics available!")
+    else:
+        print("   ❌ Hedging metrics failed!")
+
+    # Test 3: Basic analyze (with dummy image)
     print("\n" + "-" * 60)
     if test_analyze_with_sample():
         print("   ✅ Analyze endpoint working!")
     else:
         print("   ⚠️  Analyze returned error (expected with test image)")
     
-    # Test 3: Real image (if provided)
+    # Test 4: Server-rendered reports
+    print("\n" + "-" * 60)
+    if test_report_downloads():
+        print("   ✅ Report rendering working!")
+    else:
+        print("   ⚠️  Report rendering failed (requires Azure OpenAI access)")
+
+    # Test 5: Real image (if provided)
     print("\n" + "-" * 60)
     print("\n📌 To test with a real medical scan:")
     print("   python test_api.py /path/to/your/scan.png breast_ultrasound")
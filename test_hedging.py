@@ -0,0 +1,276 @@
+"""
+Unit tests for hedged vision requests (no server or Azure access required).
+Run with: python -m pytest test_hedging.py
+"""
+
+import asyncio
+import gc
+from collections import deque
+
+import pytest
+
+import main
+
+
+class FakeCompletions:
+    """Scripted stand-in for client.chat.completions: each call pops (delay, outcome)."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = []
+
+    async def create(self, **request):
+        delay, outcome = self.script[self.calls]
+        call_number = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(call_number)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeClient:
+    def __init__(self, script):
+        self.completions = FakeCompletions(script)
+        self.chat = self
+
+
+@pytest.fixture(autouse=True)
+def reset_hedging(monkeypatch):
+    """Fresh counters and latency window with a small, fast hedge configuration."""
+    monkeypatch.setattr(main, "latency_tracker", main.LatencyTracker(50))
+    monkeypatch.setattr(main, "hedge_stats", {
+        "requests": 0,
+        "hedges_fired": 0,
+        "hedge_wins": 0,
+        "budget_exhausted": 0,
+    })
+    monkeypatch.setattr(main, "hedge_window", deque(maxlen=20))
+    monkeypatch.setattr(main, "HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(main, "HEDGE_PERCENTILE", 95)
+    monkeypatch.setattr(main, "HEDGE_BUDGET", 1.0)
+
+
+def use_client(monkeypatch, script, warm=True):
+    """Install a fake client; optionally seed latencies so the hedge delay is ~0.05s."""
+    client = FakeClient(script)
+    monkeypatch.setattr(main, "get_async_openai_client", lambda: client)
+    if warm:
+        for _ in range(3):
+            main.latency_tracker.record(0.05)
+    return client.completions
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# =============================================================================
+# LatencyTracker
+# =============================================================================
+
+def test_percentile_empty():
+    assert main.LatencyTracker(10).percentile(50) is None
+
+
+def test_percentile_nearest_rank_boundaries():
+    tracker = main.LatencyTracker(10)
+    for value in range(1, 11):
+        tracker.record(float(value))
+    assert tracker.percentile(0) == 1.0
+    assert tracker.percentile(10) == 1.0
+    assert tracker.percentile(11) == 2.0
+    assert tracker.percentile(50) == 5.0
+    assert tracker.percentile(95) == 10.0
+    assert tracker.percentile(100) == 10.0
+
+
+def test_percentile_odd_count_median():
+    tracker = main.LatencyTracker(10)
+    for value in [5.0, 1.0, 3.0, 2.0, 4.0]:
+        tracker.record(value)
+    assert tracker.percentile(50) == 3.0
+
+
+def test_tracker_window_drops_oldest():
+    tracker = main.LatencyTracker(3)
+    for value in [100.0, 1.0, 2.0, 3.0]:
+        tracker.record(value)
+    assert tracker.percentile(100) == 3.0
+
+
+def test_hedge_delay_requires_min_samples():
+    main.latency_tracker.record(1.0)
+    main.latency_tracker.record(1.0)
+    assert main.get_hedge_delay() is None
+    main.latency_tracker.record(1.0)
+    assert main.get_hedge_delay() == 1.0
+
+
+# =============================================================================
+# Budget
+# =============================================================================
+
+def test_hedge_budget_available(monkeypatch):
+    monkeypatch.setattr(main, "HEDGE_BUDGET", 0.1)
+    assert not main.hedge_budget_available()
+    main.hedge_window.extend([False] * 8)
+    assert not main.hedge_budget_available()
+    main.hedge_window.append(False)
+    assert main.hedge_budget_available()
+    main.hedge_window.append(True)
+    assert not main.hedge_budget_available()
+
+
+def test_hedge_budget_does_not_bank_credit(monkeypatch):
+    """A long quiet period must not let a slowdown hedge every request."""
+    monkeypatch.setattr(main, "HEDGE_BUDGET", 0.1)
+    monkeypatch.setattr(main, "get_hedge_delay", lambda: 0.001)
+    slowdown = False
+    in_flight = 0
+
+    class SlowdownCompletions:
+        async def create(self, **request):
+            # During the slowdown the primary stalls; a hedge (sent while it is in flight) is fast
+            nonlocal in_flight
+            stall = slowdown and in_flight == 0
+            in_flight += 1
+            try:
+                await asyncio.sleep(0.01 if stall else 0)
+                return "ok"
+            finally:
+                in_flight -= 1
+
+    client = FakeClient([])
+    client.completions = SlowdownCompletions()
+    monkeypatch.setattr(main, "get_async_openai_client", lambda: client)
+
+    async def traffic():
+        nonlocal slowdown
+        for _ in range(200):
+            await main.hedged_chat_completion({})
+        assert main.hedge_stats["hedges_fired"] == 0
+
+        slowdown = True
+        for _ in range(100):
+            await main.hedged_chat_completion({})
+
+    run(traffic())
+    hedges = main.hedge_stats["hedges_fired"]
+    assert 0 < hedges <= 0.1 * 100
+    assert sum(main.hedge_window) <= 0.1 * len(main.hedge_window)
+
+
+# =============================================================================
+# hedged_chat_completion
+# =============================================================================
+
+def test_primary_wins_without_hedge(monkeypatch):
+    completions = use_client(monkeypatch, [(0.0, "primary")])
+    assert run(main.hedged_chat_completion({})) == "primary"
+    assert completions.calls == 1
+    assert main.hedge_stats["hedges_fired"] == 0
+    assert len(main.latency_tracker.samples) == 4
+
+
+def test_no_hedge_before_warmup(monkeypatch):
+    completions = use_client(monkeypatch, [(0.1, "primary")], warm=False)
+    assert run(main.hedged_chat_completion({})) == "primary"
+    assert completions.calls == 1
+
+
+def test_hedge_wins_and_primary_cancelled(monkeypatch):
+    completions = use_client(monkeypatch, [(5.0, "primary"), (0.0, "hedge")])
+    assert run(main.hedged_chat_completion({})) == "hedge"
+    assert main.hedge_stats["hedges_fired"] == 1
+    assert main.hedge_stats["hedge_wins"] == 1
+    assert completions.cancelled == [0]
+
+
+def test_primary_wins_after_hedge_fired(monkeypatch):
+    completions = use_client(monkeypatch, [(0.1, "primary"), (5.0, "hedge")])
+    assert run(main.hedged_chat_completion({})) == "primary"
+    assert main.hedge_stats["hedges_fired"] == 1
+    assert main.hedge_stats["hedge_wins"] == 0
+    assert completions.cancelled == [1]
+
+
+def test_primary_fails_hedge_succeeds(monkeypatch):
+    use_client(monkeypatch, [(0.1, RuntimeError("primary down")), (0.2, "hedge")])
+    assert run(main.hedged_chat_completion({})) == "hedge"
+    assert main.hedge_stats["hedge_wins"] == 1
+
+
+def test_both_fail_reraises(monkeypatch):
+    use_client(monkeypatch, [(0.1, RuntimeError("first")), (0.2, RuntimeError("second"))])
+    with pytest.raises(RuntimeError, match="second"):
+        run(main.hedged_chat_completion({}))
+    assert len(main.latency_tracker.samples) == 3
+
+
+def test_fast_primary_failure_reraises(monkeypatch):
+    use_client(monkeypatch, [(0.0, RuntimeError("boom"))])
+    with pytest.raises(RuntimeError, match="boom"):
+        run(main.hedged_chat_completion({}))
+    assert main.hedge_stats["hedges_fired"] == 0
+
+
+def test_simultaneous_failure_and_success_retrieves_exception(monkeypatch):
+    """A failed task finishing alongside the winner must not log 'never retrieved'."""
+    release = None
+
+    class SimultaneousCompletions:
+        calls = 0
+
+        async def create(self, **request):
+            call_number = self.calls
+            self.calls += 1
+            await release.wait()
+            if call_number == 0:
+                raise RuntimeError("primary down")
+            return "hedge"
+
+    client = FakeClient([])
+    client.completions = SimultaneousCompletions()
+    monkeypatch.setattr(main, "get_async_openai_client", lambda: client)
+    monkeypatch.setattr(main, "get_hedge_delay", lambda: 0.001)
+    unhandled = []
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        call = asyncio.create_task(main.hedged_chat_completion({}))
+        await asyncio.sleep(0.01)
+        release.set()
+        result = await call
+        gc.collect()
+        return result
+
+    assert run(scenario()) == "hedge"
+    gc.collect()
+    assert unhandled == []
+
+
+def test_budget_exhausted_skips_hedge(monkeypatch):
+    monkeypatch.setattr(main, "HEDGE_BUDGET", 0.0)
+    completions = use_client(monkeypatch, [(0.1, "primary")])
+    assert run(main.hedged_chat_completion({})) == "primary"
+    assert completions.calls == 1
+    assert main.hedge_stats["budget_exhausted"] == 1
+    assert main.hedge_stats["hedges_fired"] == 0
+
+
+def test_hedging_metrics(monkeypatch):
+    use_client(monkeypatch, [(5.0, "primary"), (0.0, "hedge")])
+    run(main.hedged_chat_completion({}))
+    metrics = main.get_hedging_metrics()
+    assert metrics["requests"] == 1
+    assert metrics["hedge_rate"] == 1.0
+    assert metrics["hedge_win_rate"] == 1.0
+    assert metrics["latency_samples"] == 4
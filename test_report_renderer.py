@@ -0,0 +1,167 @@
+"""
+Unit tests for report_renderer (no server or Azure access required).
+Run with: python -m pytest test_report_renderer.py
+"""
+
+import re
+import zipfile
+import zlib
+from io import BytesIO
+
+from report_renderer import (
+    CHARS_PER_LINE,
+    LINES_PER_PAGE,
+    build_report_archive,
+    escape_pdf_text,
+    render_report_html,
+    render_report_pdf,
+    to_winansi,
+    unsupported_pdf_characters,
+    wrap_report_lines,
+)
+
+
+SAMPLE_REPORT = {
+    "report_id": "abc123",
+    "patient_id": "PT-12345",
+    "patient_name": "<script>alert(1)</script>",
+    "generated_at": "2026-01-01T00:00:00",
+    "analysis": {
+        "scan_type": "pelvic ultrasound - ovarian assessment",
+        "classification": "PCOS_positive",
+        "confidence": "medium",
+        "findings": ["≥12 follicles per ovary", "Ovarian volume → enlarged"],
+        "report": "Peripheral follicles (string of pearls).",
+        "recommendations": ["Hormonal workup"],
+        "timestamp": "2026-01-01T00:00:00",
+        "disclaimer": "Educational use only.",
+    },
+}
+
+
+def decoded_streams(pdf: bytes) -> list[bytes]:
+    """Inflate every content stream in a rendered PDF."""
+    return [
+        zlib.decompress(match)
+        for match in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)
+    ]
+
+
+# =============================================================================
+# Wrapping
+# =============================================================================
+
+def test_wrap_keeps_short_lines():
+    assert wrap_report_lines("one\n  two\n") == ["one", "  two"]
+
+
+def test_wrap_respects_width_and_indent():
+    lines = wrap_report_lines("    " + "word " * 40, width=30)
+    assert len(lines) > 1
+    assert all(len(line) <= 30 for line in lines)
+    assert all(line.startswith("    word") for line in lines)
+
+
+def test_wrap_breaks_overlong_words():
+    lines = wrap_report_lines("x" * 250, width=100)
+    assert lines == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_wrap_terminates_on_indent_wider_than_line():
+    lines = wrap_report_lines(" " * 100 + "abc " * 40)
+    assert all(len(line) <= CHARS_PER_LINE for line in lines)
+    assert "".join(lines).replace(" ", "") == "abc" * 40
+
+
+# =============================================================================
+# Escaping and encoding
+# =============================================================================
+
+def test_escape_pdf_delimiters():
+    assert escape_pdf_text(r"a(b)c\d") == rb"a\(b\)c\\d"
+
+
+def test_winansi_transliterates_clinical_symbols():
+    assert to_winansi("≥12 → ≤3 μm") == b">=12 -> <=3 \xb5m"
+
+
+def test_winansi_keeps_cp1252_characters():
+    assert to_winansi("• 5 × 3 cm, 37°C – café") == "• 5 × 3 cm, 37°C – café".encode("cp1252")
+
+
+def test_winansi_strips_accents_outside_cp1252():
+    assert to_winansi("ā ő") == b"a o"
+
+
+# =============================================================================
+# PDF
+# =============================================================================
+
+def test_pdf_xref_offsets_point_at_objects():
+    pdf = render_report_pdf("Hello\n" * (LINES_PER_PAGE + 5))
+    assert pdf.startswith(b"%PDF-1.4")
+    assert pdf.endswith(b"%%EOF\n")
+
+    xref_offset = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[xref_offset:xref_offset + 4] == b"xref"
+
+    offsets = [int(o) for o in re.findall(rb"(\d{10}) 00000 n", pdf)]
+    for number, offset in enumerate(offsets, start=1):
+        assert pdf[offset:].startswith(f"{number} 0 obj".encode("ascii"))
+    assert b"/Count 2" in pdf
+
+
+def test_pdf_stream_lengths_match():
+    pdf = render_report_pdf("Line\n" * 10)
+    for length, body in re.findall(rb"/Length (\d+) /Filter /FlateDecode >>\nstream\n(.*?)\nendstream", pdf, re.S):
+        assert int(length) == len(body)
+
+
+def test_pdf_content_stream_contains_transliterated_text():
+    pdf = render_report_pdf("• ≥12 follicles (peripheral) → PCOS")
+    content = decoded_streams(pdf)[0]
+    assert b"(\x95 >=12 follicles \\(peripheral\\) -> PCOS) '" in content
+    assert b"?" not in content
+
+
+def test_unsupported_characters_listed_once_in_order():
+    assert unsupported_pdf_characters("≥ café रोगी रो 张") == ["र", "ो", "ग", "ी", "张"]
+    assert unsupported_pdf_characters("• ≥12 μm, 37°C") == []
+
+
+def test_pdf_flags_non_latin_patient_name():
+    pdf = render_report_pdf("Patient Name: रोगी 张伟\nScan Type: ultrasound", title="Report - PT-1")
+    content = decoded_streams(pdf)[0]
+    assert b"!! PDF CHARACTER NOTICE !!" in content
+    assert b"U+0930 U+094B U+0917 U+0940 U+5F20 U+4F1F" in content
+    assert b"(Patient Name: ???? ??) '" in content
+    assert content.index(b"NOTICE") < content.index(b"Patient Name")
+
+
+def test_pdf_without_unsupported_characters_has_no_notice():
+    content = decoded_streams(render_report_pdf("Patient Name: José ≥ 12"))[0]
+    assert b"NOTICE" not in content
+
+
+def test_pdf_handles_empty_text():
+    pdf = render_report_pdf("")
+    assert b"/Count 1" in pdf
+
+
+# =============================================================================
+# HTML and archive
+# =============================================================================
+
+def test_html_escapes_and_keeps_unicode():
+    document = render_report_html(SAMPLE_REPORT)
+    assert "&lt;script&gt;" in document
+    assert "<script>" not in document
+    assert "≥12 follicles per ovary" in document
+    assert "PCOS_POSITIVE" in document
+
+
+def test_archive_contains_all_files():
+    data = build_report_archive({"a.pdf": b"one", "b.html": b"two"})
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        assert archive.namelist() == ["a.pdf", "b.html"]
+        assert archive.read("b.html") == b"two"